@@ -3,19 +3,37 @@
 
 __author__ = "Mads Meisner-Jensen"
 import os
+import re
 import sys
 import argparse
 import time
 import datetime
-import requests
+import random
 import threading
-import traceback
-import configparser
-import xml.dom.minidom as minidom
-import urllib
-from requests.auth import HTTPBasicAuth
+import functools
+import json
 from pathlib import Path
-from pprint import pprint, pformat
+# NOTE: Heavier modules (requests in particular) are imported where they are
+# used, such that e.g. `--help` and `--makeconf` start up quickly
+
+@functools.lru_cache(maxsize=None)
+def optional_import(name):
+    """
+    Import optional module `name` on first use (not at startup)
+
+    :return: The module or None if it is not installed
+    """
+    import importlib
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+# orjson is optional: it is considerably faster than the json module for the
+# large api/json responses Jenkins can return
+def json_loads(data):
+    orjson = optional_import("orjson")
+    return orjson.loads(data) if orjson else json.loads(data)
 
 
 #####################################################################
@@ -53,22 +71,45 @@ def color_enable(force=False):
             miniwarn=fg.iyellow,
         )
 
-def xml_get_first_child_node_of_tag(dom, tag):
+insecure_request_warning_disabled = False
+
+def disable_insecure_request_warning():
+    """
+    Disable urllib3 InsecureRequestWarning: "Unverified HTTPS request" warnings.
+    Only done once, on first use of the network
     """
-    See https://docs.python.org/3.6/library/xml.dom.minidom.html
-    See https://docs.python.org/3.6/library/xml.dom.html
+    global insecure_request_warning_disabled
+    if insecure_request_warning_disabled:
+        return
+    import urllib3
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    insecure_request_warning_disabled = True
+
+def xml_get_first_child_node_of_tag(root, tag):
+    """
+    See https://docs.python.org/3/library/xml.etree.elementtree.html
 
-    :param dom: result of minidom.parseString(config_xml)
-    :param tag: name of XML tag
-    :return:
+    :param root: result of ElementTree.fromstring(config_xml)
+    :param tag:  name of XML tag
+    :return:     First element with name `tag` (read/write its `.text`) or None
     """
-    node = dom.getElementsByTagName(tag)
-    if node and node[0].childNodes and node[0].childNodes.length > 0:
-        child = node[0].firstChild
-        if child.nodeType == minidom.Node.TEXT_NODE:
-            return child
-    else:
-        return None
+    return root.find(f".//{tag}")
+
+# Matches the pipeline <script> element of a job config.xml (as bytes)
+SCRIPT_ELEMENT_RE = re.compile(rb'(<script>)(.*?)(</script>)', re.DOTALL)
+
+def xml_replace_script_text(xml_bytes, script_text):
+    """
+    Replace text of first <script> element in `xml_bytes` without parsing the XML
+
+    :param xml_bytes:   config.xml content
+    :param script_text: New (unescaped) script text
+    :return:            New config.xml content or None if no <script> element was found
+    """
+    import xml.sax.saxutils as saxutils
+    escaped = saxutils.escape(script_text).encode("utf-8")
+    new_xml, count = SCRIPT_ELEMENT_RE.subn(lambda m: m.group(1) + escaped + m.group(3), xml_bytes, count=1)
+    return new_xml if count else None
 
 def is_posix():
     try:
@@ -78,13 +119,54 @@ def is_posix():
         return False
 
 def key_value_str_to_dict(s):
+    """
+    Convert string like 'foo=1,baz=10' to dictionary. Values may contain '='
+
+    >>> key_value_str_to_dict("foo=1,baz=a=b")
+    {'foo': '1', 'baz': 'a=b'}
+    """
     d = {}
-    kv_list = s.split(",")
-    for kv in kv_list:
-        k, v = kv.split("=")
+    # every comma separated item must be a key=value pair with a non-empty key
+    for kv in s.split(","):
+        k, sep, v = kv.partition("=")
+        if not sep or not k:
+            raise ValueError(f"Invalid key=value pair '{kv}' in list: '{s}'")
         d[k] = v
     return d
 
+@functools.lru_cache(maxsize=16)
+def key_value_str_to_mapping(s):
+    """
+    Cached, read-only version of `key_value_str_to_dict()`. Empty string gives empty mapping
+    """
+    import types
+    return types.MappingProxyType(key_value_str_to_dict(s) if s else {})
+
+def write_file_atomic(path, data):
+    """
+    Write `data` (bytes) to a temporary file next to `path` and rename it
+    to `path`, so readers never see a partially written file
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb", buffering=1 << 20) as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_lines(lines, file=None):
+    """
+    Write list of lines with a single write call, instead of one print() per line
+    """
+    if not lines:
+        return
+    if file is None:
+        file = sys.stdout
+    file.write("\n".join(lines) + "\n")
+
 def deltatimeToHumanStr(deltaTime, decimalPlaces=0, separator=' '):
     """
     Format number of seconds or a datetime.deltatime object into a short human readable string
@@ -109,31 +191,41 @@ def deltatimeToHumanStr(deltaTime, decimalPlaces=0, separator=' '):
     """
     if not isinstance(deltaTime, datetime.timedelta):
         deltaTime = datetime.timedelta(seconds=deltaTime)
+    return _timedelta_to_human_str(deltaTime, decimalPlaces, separator)
 
+@functools.lru_cache(maxsize=1024)
+def _timedelta_to_human_str(deltaTime, decimalPlaces, separator):
     d = deltaTime.days
     h, s = divmod(deltaTime.seconds, 3600)
     m, s = divmod(s, 60)
-    s = float(s) + float(deltaTime.microseconds) / 1000000
-    #print("FOO", s, deltaTime.microseconds, float(deltaTime.microseconds)/1000000)
+    s += deltaTime.microseconds / 1000000
 
-    dhms = ""
+    parts = []
     if d > 0:
-        dhms += str(d) + 'd' + separator
-    if h > 0 or len(dhms) > 0:
-        dhms += str(h) + 'h' + separator
-    if m > 0 or len(dhms) > 0:
-        dhms += str(m) + 'm' + separator
-    if s > 0 or len(dhms) > 0:
-        dhms += ('{:.%df}s' % decimalPlaces).format(s)
-
-    return dhms
+        parts.append(f"{d}d")
+    if h > 0 or parts:
+        parts.append(f"{h}h")
+    if m > 0 or parts:
+        parts.append(f"{m}m")
+    if s > 0 or parts:
+        parts.append(f"{s:.{decimalPlaces}f}s")
+
+    return separator.join(parts)
+
+@functools.lru_cache(maxsize=4096)
+def _timestamp_ms_to_dt(ts_ms):
+    """
+    :param ts_ms: Timestamp in milliseconds as int (normalized by caller so cache hits are consistent)
+    :return:      datetime.datetime object
+    """
+    return datetime.datetime.fromtimestamp(ts_ms / 1000)
 
 def timestamp_ms_to_datetime(ts_ms):
-    t = datetime.datetime.fromtimestamp(int(ts_ms) / 1000)
+    t = _timestamp_ms_to_dt(int(ts_ms))
     return t.strftime("%Y-%m-%d %H:%M:%S")
 
 def timestamp_ms_to_deltatime(ts_ms):
-    t = datetime.datetime.fromtimestamp(int(ts_ms) / 1000)
+    t = _timestamp_ms_to_dt(int(ts_ms))
     dt = datetime.datetime.now() - t
     return deltatimeToHumanStr(dt)
 
@@ -149,7 +241,8 @@ def timestamp_ms_to_datetime_and_deltatime(ts_ms):
 
 # Jenkins has some advanced REST methods where one can select specific JSON fields, like:
 # http://jenkins.lan/job/JOBNAME/api/json?tree=builds[number,result,duration,url,actions[parameters[name,value]]]
-# In this code, we just retrieve everything and filter stuff ourselves
+# In this code, we use the 'tree' parameter to request only the fields we actually use,
+# as a full api/json response (e.g. with all 'actions') can be very large
 
 
 class JenkinsException(Exception):
@@ -166,6 +259,8 @@ class Config(object):
 
     """
     FILENAME = os.path.expanduser("~/.jenkins.ini")
+    # Parsed config files keyed by (filename, mtime)
+    _parsed_cache = {}
 
     def __init__(self):
         self.server_url = "https://jenkins.url.not.set"
@@ -192,8 +287,13 @@ class Config(object):
             return
 
         # ConfigParser stores values as strings, so you have to convert them yourself
-        cfg = configparser.ConfigParser()
-        cfg.read(filename)
+        key = (filename, os.stat(filename).st_mtime_ns)
+        cfg = Config._parsed_cache.get(key)
+        if cfg is None:
+            import configparser
+            cfg = configparser.ConfigParser()
+            cfg.read(filename)
+            Config._parsed_cache[key] = cfg
 
         # Read the global section (which are the instance variables of this class)
         section = "global"
@@ -221,6 +321,7 @@ class Config(object):
         return filename
 
     def write(self):
+        import configparser
         d = { name:getattr(self, name) for name in self.__dict__.keys() }
         cfg = configparser.ConfigParser()
         cfg["global"] = d
@@ -265,11 +366,41 @@ class Jenkins(object):
         # Following three are typically not that interesting
         'lastStableBuild', 'lastUnstableBuild', 'lastUnsuccessfulBuild'
     )
+    _BUILD_NAMES_LC = tuple(b.lower() for b in BUILD_NAMES)
+    # Common abbreviations of build names. Some of these would otherwise be
+    # ambiguous substrings, e.g. 'succ' is also found in 'lastUnsuccessfulBuild'
+    _BUILD_ABBREV = {
+        'last': 'lastBuild',
+        'comp': 'lastCompletedBuild',
+        'fail': 'lastFailedBuild',
+        'succ': 'lastSuccessfulBuild',
+        'stable': 'lastStableBuild',
+        'unstable': 'lastUnstableBuild',
+        'unsucc': 'lastUnsuccessfulBuild',
+    }
+
+    CACERT_ERROR_MSG = """
+It seems you don't have the Jenkins (self-signed) CA certificate installed
+or the certificate has expired. 
+"""
 
-    def __init__(self, verbose=1):
-        # disable InsecureRequestWarning: "Unverified HTTPS request" warnings
-        requests.packages.urllib3.disable_warnings(requests.urllib3.exceptions.InsecureRequestWarning)
+    # (connect, read) timeouts in seconds. The read timeout is the max time
+    # between bytes received, so it also bounds a stalled streaming download.
+    # Streamed responses get a longer one as e.g. a workspace zip can take a
+    # while before the first byte is sent
+    HTTP_TIMEOUT = (5, 30)
+    HTTP_STREAM_TIMEOUT = (5, 300)
+
+    # Max number of response body bytes printed with -dt
+    LOG_BODY_MAX = 64 * 1024
+
+    # Max number of concurrent requests when fetching builds, logs, artifacts etc.
+    HTTP_WORKERS = 8
 
+    # Headers for api/json requests (shared, never modified)
+    API_JSON_HEADERS = {'Accept': 'application/json'}
+
+    def __init__(self, verbose=1):
         # Configurable settings (read form config file)
         self.config_was_read_ok = False
         self.server_url = None
@@ -282,20 +413,31 @@ class Jenkins(object):
         self.stop_job_on_user_abort = False
 
         self._conn_ok = False
+        self._session = None
+        self._auth = None
+        # job URLs keyed by (server_url, job_name[, job_id])
+        self._url_cache = {}
 
         self.job_name = ""
         self.job_id = ""
         self.job_id_low = 0
         self.job_id_high = 0
+        self._job_id_list = None
         self.job_started = None
         self.artifacts = None
 
         self.build_params_default = ""
 
         self.console_output_file = True
+        # Set to make a console stream stop polling (see get_console_output_in_background())
+        self._console_stop = threading.Event()
 
         self.verbose = verbose
         self.log_progress = True
+        # stdout that echo_progress() last wrote to and whether it is a terminal
+        self._progress_out = None
+        self._progress_tty = False
+        self._progress_lines = 0
 
         self.log_req = False
         self.log_resp_status = False
@@ -303,6 +445,8 @@ class Jenkins(object):
         self.log_resp_text = False
         self.log_resp_json = False
 
+        self._refresh_fmt()
+
     def __str__(self):
         return f"<Jenkins {self.server_url} auth={self.auth_user}>"
 
@@ -317,21 +461,61 @@ class Jenkins(object):
     def get_log_help():
         return "s = send, r = response status, h = response headers, t = response text, j = response pretty json"
 
+    def _refresh_fmt(self):
+        """
+        Cache the color escape sequences used by the echo functions.
+        Must be called again after color_enable()
+        """
+        self._fmt_reset = fg.reset
+        self._fmt_progress = color.progress
+        self._fmt_note = color.note
+        self._fmt_info = color.info
+        # On a terminal progress lines are written as bytes directly to the stdout buffer
+        self._fmt_progress_b = color.progress.encode("ascii")
+        self._fmt_reset_nl_b = fg.reset.encode("ascii") + b"\n"
+
     def echo_progress(self, s):
-        if self.log_progress:
-            print(f"{color.progress}{s}{fg.reset}")
+        if not self.log_progress:
+            return
+        out = sys.stdout
+        if out is not self._progress_out:
+            self._progress_out = out
+            self._progress_tty = out.isatty()
+        buf = getattr(out, "buffer", None)
+        if buf is None or not self._progress_tty:
+            # Redirected to file or pipe: write through the text layer, which
+            # keeps the order with other output, and only flush every 64 lines
+            out.write(self._fmt_progress + s + self._fmt_reset + "\n")
+            self._progress_lines += 1
+            if self._progress_lines % 64 == 0:
+                out.flush()
+            return
+        # flush pending text first so output order is retained
+        out.flush()
+        buf.write(self._fmt_progress_b + s.encode("utf-8", "replace") + self._fmt_reset_nl_b)
+        buf.flush()
+
+    # The echo functions print `s` if verbosity is at least `level`. If `args`
+    # are given, `s` is a %-format string which is only formatted when the
+    # message is actually printed
 
-    def echo_note(self, s, level=0, file=None):
+    def echo_note(self, s, *args, level=0, file=None):
         if self.verbose >= level:
-            print(f"{color.note}{s}{fg.reset}", file=file)
+            if args:
+                s = s % args
+            print(self._fmt_note + s + self._fmt_reset, file=file)
 
-    def echo_info(self, s, level=0):
+    def echo_info(self, s, *args, level=0):
         if self.verbose >= level:
-            print(f"{color.info}{s}{fg.reset}")
+            if args:
+                s = s % args
+            print(self._fmt_info + s + self._fmt_reset)
 
-    def echo_verb(self, s, level=1):
+    def echo_verb(self, s, *args, level=1):
         if self.verbose >= level:
-            print(f"{color.info}{s}{fg.reset}")
+            if args:
+                s = s % args
+            print(self._fmt_info + s + self._fmt_reset)
 
     def echo_color(self, s, color=Color.white, level=0, file=sys.stdout):
         if self.verbose >= level:
@@ -351,13 +535,14 @@ class Jenkins(object):
 
     def job_id_iter(self):
         """
-        Iterator over all job_id's if user supplied something like `foobaz/23..28
+        All job_id's if user supplied something like `foobaz/23..28`.
+        The expanded tuple is computed once and reused until the job name/id changes
         """
         if self.job_id_low > 0 and self.job_id_high > 0:
-            for job_id in range(self.job_id_low, self.job_id_high + 1):
-                yield job_id
-        else:
-            yield self.job_id
+            if self._job_id_list is None:
+                self._job_id_list = tuple(range(self.job_id_low, self.job_id_high + 1))
+            return self._job_id_list
+        return (self.job_id,)
 
     def set_job_name_and_id(self, job_name, job_id='lastSuccessfulBuild'):
         if not job_name:
@@ -366,6 +551,7 @@ class Jenkins(object):
         if len(parts) == 2:
             job_name, job_id = parts
 
+        self.job_id_low = self.job_id_high = 0
         if ".." in job_id:
             parts = job_id.split("..")
             if len(parts) == 2:
@@ -379,16 +565,18 @@ class Jenkins(object):
 
         self.job_name = job_name
         self.job_id = job_id
-        if all([x in '0123456789' for x in job_id]):
+        self._url_cache.clear()
+        self._job_id_list = None
+        # empty or numeric job_id
+        if not job_id or (job_id.isascii() and job_id.isdigit()):
             return
-        if job_id == "last":
-            self.job_id = Jenkins.BUILD_NAMES[0]
+
+        job_id_lc = job_id.lower()
+        if job_id_lc in self._BUILD_ABBREV:
+            self.job_id = self._BUILD_ABBREV[job_id_lc]
             return
 
-        m = []
-        for b in Jenkins.BUILD_NAMES:
-            if job_id.lower() in b.lower():
-                m.append(b)
+        m = [b for b, b_lc in zip(Jenkins.BUILD_NAMES, self._BUILD_NAMES_LC) if job_id_lc in b_lc]
         if len(m) > 1:
             raise ValueError(f"job_id matches several build types: {m}")
         if len(m) == 0:
@@ -397,6 +585,19 @@ class Jenkins(object):
 
         self.job_id = m[0]
 
+    def _refresh_auth(self):
+        """
+        Create the HTTPBasicAuth object from `auth_user` and `auth_password`.
+        Must be called whenever the credentials are changed
+        """
+        from requests.auth import HTTPBasicAuth
+        if self.auth_user and self.auth_password:
+            self._auth = HTTPBasicAuth(username=self.auth_user, password=self.auth_password)
+        else:
+            self._auth = None
+        if self._session is not None:
+            self._session.auth = self._auth
+
     def assert_auth_is_valid(self):
         s = "Add it to the jenkins config file or supply it with --auth option"
         if not self.auth_user:
@@ -404,6 +605,57 @@ class Jenkins(object):
         if not self.auth_password:
             raise ValueError(f"Jenkins password/API-token is not set: {s}")
 
+    @property
+    def session(self):
+        """
+        Persistent HTTP session shared by all requests, such that TCP/TLS
+        connections are pooled and kept alive between requests.
+        The session is created on first use, i.e. after the config file and
+        command-line options have been applied.
+        """
+        if self._session is None:
+            disable_insecure_request_warning()
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            # Only idempotent reads are retried on 5xx/read errors. Requests with
+            # side effects (build, stop, cancel, config.xml, ...) must be POSTs
+            retry = Retry(total=3, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504),
+                          allowed_methods=frozenset(("GET", "HEAD", "OPTIONS")),
+                          raise_on_status=False)
+            # Keep a connection per worker thread plus a few for the main thread
+            # and the background console reader, so none are discarded.
+            # pool_connections is the number of per-host pools: all requests go to
+            # the Jenkins server (plus possibly a redirect target).
+            # NOTE: requests only speaks HTTP/1.1, so concurrent requests use
+            # separate kept-alive connections rather than HTTP/2 streams
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.HTTP_WORKERS + 4, max_retries=retry)
+            session = requests.Session()
+            session.headers['User-Agent'] = f"jenkins-cli python-requests/{requests.__version__}"
+            session.verify = self.check_certificate
+            session.auth = self._auth
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            if self.server_url:
+                # Resolve proxy, CA bundle and .netrc settings from the environment
+                # once, instead of requests doing it again for every request
+                env = session.merge_environment_settings(self.server_url, {}, None, session.verify, None)
+                session.proxies.update(env['proxies'])
+                session.verify = env['verify']
+                if session.auth is None:
+                    session.auth = requests.utils.get_netrc_auth(self.server_url)
+                session.trust_env = False
+            self._session = session
+        return self._session
+
+    def close(self):
+        """
+        Close the HTTP session and its pooled connections
+        """
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
     def request(self, url, method="GET", params=None, headers=None, data=None, auth=None, **kwargs):
         """
         see https://stackoverflow.com/questions/16907684/fetching-a-url-from-a-basic-auth-protected-jenkins-server-with-urllib2
@@ -414,24 +666,24 @@ class Jenkins(object):
         :param headers: Dictionary of user headers
         :param params:  Dictionary of request params
         :param data:    Dictionary of form data
-        :param auth:    True to use authenticated request
-        :return:        requests.Response object from requests.get()
+        :param auth:    False to force unauthenticated request. Otherwise the request is
+                        authenticated whenever credentials are available
+        :param kwargs:  Extra arguments for requests.Session.request(). Default
+                        `timeout` is HTTP_TIMEOUT or HTTP_STREAM_TIMEOUT
+        :return:        requests.Response object from requests.Session.request()
         """
-        if auth:
-            auth = HTTPBasicAuth(username=self.auth_user, password=self.auth_password)
+        if 'timeout' not in kwargs:
+            kwargs['timeout'] = self.HTTP_STREAM_TIMEOUT if kwargs.get('stream') else self.HTTP_TIMEOUT
+        if auth is not False:
+            auth = self._auth
 
         if self.log_req:
+            import urllib.parse
             q = "?" + urllib.parse.urlencode(params) if params else ""
             auth_str = f"with HTTPBasicAuth(username={self.auth_user})" if auth else ""
             print(f"{color.send}{method} {url}{q}{fg.reset} {auth_str}")
 
-        response = requests.request(method, url, headers=headers, params=params, data=data, verify=self.check_certificate, auth=auth, **kwargs)
-
-        if not auth and response.status_code == 403 and self.auth_user and self.auth_password:
-            self.log_response(response)
-            self.echo_progress("Retrying with HTTPBasicAuth")
-            auth = HTTPBasicAuth(username=self.auth_user, password=self.auth_password)
-            response = requests.request(method, url, headers=headers, params=params, data=data, verify=self.check_certificate, auth=auth, **kwargs)
+        response = self.session.request(method, url, headers=headers, params=params, data=data, auth=auth, **kwargs)
 
         self.log_response(response)
 
@@ -442,45 +694,57 @@ class Jenkins(object):
 
         return response
 
-    def request_api_json(self, url, params=None, try_auth=False, **kwargs):
+    def request_api_json(self, url, params=None, **kwargs):
         """
         Send request and return response as JSON
 
         :param url:      URL of the form "http://some.server.loc/job/{name}/api/json"
         :param params:   Dictionary of request params
-        :param try_auth: Use authenticated request if possible
         :return:         JSON response object
         """
         if not url.endswith("/api/json"):
             url += "/api/json"
+        kwargs.setdefault('headers', self.API_JSON_HEADERS)
 
-        # Use authenticated request if we have username and password available
-        with_auth = try_auth and self.auth_user and self.auth_password
-        response = self.request(url, params=params, auth=with_auth, **kwargs)
+        response = self.request(url, params=params, **kwargs)
+        return self.response_json(response)
 
+    def response_json(self, response):
+        """
+        :param response: requests.Response object with a JSON body
+        :return:         JSON response object
+        """
         if self.log_resp_text:
-            print(response.text)
-
-        jr = response.json()
+            # decode (a bounded part of) the bytes instead of response.text, which
+            # would run charset detection and keep a decoded copy of the whole body
+            body = response.content
+            print(body[:self.LOG_BODY_MAX].decode("utf-8", "replace"))
+            if len(body) > self.LOG_BODY_MAX:
+                print(f"... ({len(body) - self.LOG_BODY_MAX} more bytes)")
+
+        jr = json_loads(response.content)
         if self.log_resp_json:
-            pprint(jr)
+            orjson = optional_import("orjson")
+            if orjson:
+                print(orjson.dumps(jr, option=orjson.OPT_INDENT_2).decode())
+            else:
+                from pprint import pprint
+                pprint(jr)
 
         return jr
 
 
     def assert_connectivity(self):
         # NOTE: we could also use requests.get(..., cert=FILEPATH) to pass in the CA certificate
+        import requests
 
         self.echo_info(f"Checking Jenkins connectivity: {self.server_url}")
         try:
-            requests.get(self.server_url, verify=False)
+            # HEAD as only the TLS handshake and status matter, not the front page body
+            self.session.head(self.server_url, timeout=5, allow_redirects=False)
             self._conn_ok = True
         except requests.exceptions.SSLError:
-            error_msg_cacert = """
-It seems you don't have the Jenkins (self-signed) CA certificate installed
-or the certificate has expired. 
-"""
-            raise JenkinsException(error_msg_cacert)
+            raise JenkinsException(self.CACERT_ERROR_MSG)
 
 
     def get_job_url(self, name=None):
@@ -488,9 +752,7 @@ or the certificate has expired.
             name = self.job_name
         else:
             self.job_name = name
-        if not name:
-            raise ValueError("JOB name argument mssing")
-        return f"{self.server_url}/job/{name}"
+        return self._job_url(name)
 
     def get_job_id_url(self, name=None, job_id=None):
         if not job_id:
@@ -499,42 +761,70 @@ or the certificate has expired.
             self.job_id = job_id
         if not job_id:
             raise ValueError(f"Missing job ID. Try again with something like: {prog} ... {jen.job_name}/last")
-        return self.get_job_url(name) + f"/{job_id}"
+        if name:
+            self.job_name = name
+        return self._job_url(self.job_name, job_id)
+
+    def _job_url(self, name, job_id=None):
+        """
+        Like `get_job_id_url()` but without updating self.job_name/job_id, so it
+        is safe to call from several threads (see print_project())
+
+        :param name:   Jenkins job name
+        :param job_id: Jenkins job ID or None for the URL of the job itself
+        """
+        if not name:
+            raise ValueError("JOB name argument mssing")
+        key = (self.server_url, name, job_id)
+        url = self._url_cache.get(key)
+        if url is None:
+            url = f"{self.server_url}/job/{name}"
+            if job_id:
+                url += f"/{job_id}"
+            self._url_cache[key] = url
+        return url
 
     def list_projects(self):
         url = f"{self.server_url}"
-        jr = jen.request_api_json(url, {'tree': "jobs[name]"})
+        jr = self.request_api_json(url, {'tree': "jobs[name]"})
         jobs = jr.get('jobs')
+        lines = []
         for job in jobs:
             _class = job.get('_class')
             if _class:
                 _class = _class.split(".")[-1]
             name = job.get('name')
             if self.verbose:
-                print(name, _class)
+                lines.append(f"{name} {_class}")
             else:
-                print(name)
+                lines.append(name)
+
+        # write all lines at once, there can be many projects
+        write_lines(lines)
 
     def list_queue(self):
         w = 13
-        def print_queue_item(i, j):
+        def format_queue_item(i, j):
             _class = j.get('_class')
             if not _class:
-                return
+                return []
 
-            print(f"{i:3d} {_class:{w}} '{j['name']}' {j.get('id')}")
+            lines = [f"{i:3d} {_class:{w}} '{j['name']}' {j.get('id')}"]
 
             # 'blocked', 'buildableStartMilliseconds',
             #for k in ('name', 'id', 'inQueueSince', 'timestamp', 'why'):
             for k in ('inQueueSince', 'timestamp', 'why'):
                 if k not in j:
                     continue
-                print(f"    {k:{w}} {j.get(k)}")
+                lines.append(f"    {k:{w}} {j.get(k)}")
+            return lines
 
+        lines = []
         for i, item in enumerate(self.get_queue()):
             if self.job_name and self.job_name != item['name']:
                 continue
-            print_queue_item(i, item)
+            lines += format_queue_item(i, item)
+        write_lines(lines)
 
     def get_queue(self):
         def fixup_queue_item(j):
@@ -568,7 +858,8 @@ or the certificate has expired.
             return j
 
         url = f"{self.server_url}/queue"
-        jr = jen.request_api_json(url)
+        params = {'tree': 'items[_class,id,inQueueSince,timestamp,why,task[name]]'}
+        jr = self.request_api_json(url, params=params)
         for item in jr.get('items'):
             yield fixup_queue_item(item)
 
@@ -580,10 +871,10 @@ or the certificate has expired.
 
     def list_nodes(self, oneline=True):
         w = 13
-        def print_computer(i, j):
+        def format_computer(i, j):
             _class = j.get('_class')
             if not _class:
-                return
+                return []
 
             displayName = j['displayName']
             desc = j.get('description')
@@ -591,22 +882,25 @@ or the certificate has expired.
             numExecutors = j.get('numExecutors')
             idle_busy = "idle" if j.get('idle') is True else "busy"
             on_offline = "offline" if j.get('offline') is True else "online"
-            temp_space = j['monitorData'].get('hudson.node_monitors.TemporarySpaceMonitor', {})
-            if temp_space:
+            temp_space = (j.get('monitorData') or {}).get('hudson.node_monitors.TemporarySpaceMonitor')
+            if temp_space and 'size' in temp_space:
                 size = temp_space['size']
                 disk_free = "disk_free={:.1f}GB".format((size >> 20) / 1024)
             else:
                 disk_free = ""
 
             if oneline:
-                print(f"{i:3d} {_class} {idle_busy} {numExecutors} {on_offline} '{displayName}' labels='{labels}' desc='{desc}' {disk_free}")
-            else:
-                print(f"{i:3d} {_class:{w}} '{displayName}' {desc}")
-                for k in ('labels', 'idle', 'numExecutors'):
-                    print(f"    {k:{w}} {j.get(k)}")
+                return [f"{i:3d} {_class} {idle_busy} {numExecutors} {on_offline} '{displayName}' labels='{labels}' desc='{desc}' {disk_free}"]
 
+            lines = [f"{i:3d} {_class:{w}} '{displayName}' {desc}"]
+            for k in ('labels', 'idle', 'numExecutors'):
+                lines.append(f"    {k:{w}} {j.get(k)}")
+            return lines
+
+        lines = []
         for i, item in enumerate(self.get_nodes(search=self.job_name)):
-            print_computer(i, item)
+            lines += format_computer(i, item)
+        write_lines(lines)
 
     def get_nodes(self, search=None):
         def fixup_computer(j):
@@ -619,7 +913,9 @@ or the certificate has expired.
 
         # authenticated request adds "monitorData" dictionary to response
         url = f"{self.server_url}/computer"
-        jr = jen.request_api_json(url, try_auth=True)
+        params = {'tree': 'computer[_class,displayName,description,assignedLabels[name],numExecutors,idle,offline,'
+                          'monitorData[hudson.node_monitors.TemporarySpaceMonitor[size]]]'}
+        jr = self.request_api_json(url, params=params)
         for item in jr.get('computer'):
             c = fixup_computer(item)
             if not search:
@@ -654,7 +950,9 @@ or the certificate has expired.
         Print info on a single project
         """
         url = self.get_job_url(name)
-        jr = self.request_api_json(url)
+        tree = ['fullName,description,property[_class,parameterDefinitions[name,defaultParameterValue[value],description]]']
+        tree += [f"{b}[number]" for b in Jenkins.BUILD_NAMES[:4]]
+        jr = self.request_api_json(url, params={'tree': ",".join(tree)})
 
         _class = jr.get('_class')
         if _class:
@@ -672,8 +970,7 @@ or the certificate has expired.
                 name_to_number[name] = number
 
         if show_only_all_builds:
-            jr = self.build_get(job_id="all")
-            for jr_build in reversed(jr.get('builds')):
+            for jr_build in reversed(list(self.iter_all_builds())):
                 self.build_print(jr_build, oneline=True, name_to_number=name_to_number)
             return
 
@@ -708,11 +1005,16 @@ or the certificate has expired.
             if len(prop) > 1:
                 printProperty()
 
-        # Iterate only over distinct/unique build numbers
+        # Fetch only distinct/unique build numbers. The requests are independent
+        # so issue them concurrently and print the results in build order
         numbers = set(name_to_number.values())
-        for number in sorted(numbers):
-            jr_build = self.build_get(job_id=number)
-            self.build_print(jr_build, name_to_number=name_to_number)
+        if numbers:
+            import concurrent.futures
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.HTTP_WORKERS, len(numbers))) as ex:
+                futures = {ex.submit(self.build_get, job_id=number): number for number in numbers}
+                builds = {futures[f]: f.result() for f in concurrent.futures.as_completed(futures)}
+            for number in sorted(builds):
+                self.build_print(builds[number], name_to_number=name_to_number)
 
         if self.verbose:
             queue = list(self.get_queue_by_job(self.job_name))
@@ -763,62 +1065,116 @@ or the certificate has expired.
         :param job_id: Jenkins job ID
         :return:       JSON response object of request "{self.server_url}/job/{name}/{job_id}"
         """
-        url = self.get_job_id_url(name=name, job_id=job_id)
-        params = {}
-        if self.job_id == "all":
-            url = self.get_job_url()
+        # build_get() is called concurrently (see print_project()), so it must
+        # not update self.job_name/job_id like get_job_id_url() does
+        name = name or self.job_name
+        job_id = job_id or self.job_id
+        if not job_id:
+            raise ValueError(f"Missing job ID. Try again with something like: {prog} ... {name}/last")
+        url = self._job_url(name, job_id)
+        params = {'tree': 'number,result,building,timestamp,duration,estimatedDuration,'
+                          'artifacts[displayPath,fileName,relativePath]'}
+        if job_id == "all":
+            url = self._job_url(name)
             params = {'tree': 'jobs[name]'}
             params = {'tree': 'jobs[name,url,builds[number,result,duration,url]]'}
             params = {'tree': 'builds[number,result,timestamp,duration,estimatedDuration]'}
             #url = f"{self.server_url}"
         return self.request_api_json(url, params=params)
 
-    def get_config_as_xml_and_dom(self, name=None):
+    def iter_all_builds(self, name=None):
         """
-        Get Jenkins job config XML
+        Iterate over all builds of job, newest first.
+        The response is stream parsed if the ijson module is available
+
+        :param name:   Jenkins job name
+        :return:       Iterator of build JSON objects
+        """
+        # ijson is optional: it is used for stream parsing the (possibly huge) list of all builds
+        ijson = optional_import("ijson")
+        if not ijson:
+            jr = self.build_get(name=name, job_id="all")
+            yield from jr.get('builds', [])
+            return
+
+        url = self.get_job_url(name) + "/api/json"
+        params = {'tree': 'builds[number,result,timestamp,duration,estimatedDuration]'}
+        with self.request(url, params=params, headers=self.API_JSON_HEADERS, stream=True) as response:
+            response.raw.decode_content = True
+            yield from ijson.items(response.raw, 'builds.item', use_float=True)
+
+    def get_config_xml(self, name=None):
+        """
+        Get Jenkins job config XML without parsing it
 
         :param name:  Jenkins job name
-        :return:      XML text, xml.dom.minidom.Document object
+        :return:      XML content as bytes
         """
         job_url = self.get_job_url(name=name)
         url = f"{job_url}/config.xml"
         response = self.request(url, auth=True)
+        return response.content
+
+    def get_config_xml_text(self, name=None):
+        """
+        Get Jenkins job config XML as text, without parsing it
 
-        dom = minidom.parseString(response.text)
+        :param name:  Jenkins job name
+        :return:      XML text
+        """
+        return self.get_config_xml(name=name).decode("utf-8")
+
+    def get_config_as_xml_and_dom(self, name=None):
+        """
+        Get Jenkins job config XML
+
+        :param name:  Jenkins job name
+        :return:      XML text, xml.etree.ElementTree.Element root object
+        """
+        import xml.etree.ElementTree as ElementTree
+        text = self.get_config_xml_text(name=name)
+
+        dom = ElementTree.fromstring(text)
 
         # warn on unexpected content
-        first_tag = dom.documentElement.tagName
-        if not response.text.startswith('<?xml version='):
+        first_tag = dom.tag
+        if not text.startswith('<?xml version='):
             self.echo_note("Content of response is not XML as expected", file=sys.stderr)
         root_tags = ("flow-definition", "project")
         if first_tag not in root_tags:
             self.echo_note(f"Root element is '{first_tag}' but expected one of: {root_tags}", file=sys.stderr)
 
-        return response.text, dom
+        return text, dom
 
     def get_system_log(self):
         url = f"{self.server_url}/api/system/logs"
         response = self.request(url, method="GET", auth=True)
         print(response.content)
 
-    def post_config_xml(self, xml_text=None, filename=None, name=None):
+    def post_config_xml(self, xml_text=None, filename=None, name=None, data=None, saved_as=None):
         """
         Post config.xml to Jenkins job
 
         :param xml_text:
         :param filename:
         :param name:
+        :param data: config.xml as bytes, posted as is
+        :param saved_as: name of file where `xml_text` or `data` was also saved
         :return:
         """
+        import requests
         job_url = self.get_job_url(name=name)
         url = f"{job_url}/config.xml"
 
-        if filename and xml_text:
-            raise ValueError("Ambiguous arguments: both xml_text and filename supplied")
+        if sum(x is not None for x in (xml_text, filename, data)) > 1:
+            raise ValueError("Ambiguous arguments: only one of xml_text, filename or data can be supplied")
+        if data is not None:
+            xml_text = data
         if not xml_text:
-            xml_text = open(filename, "r").read()
+            with open(filename, "r") as f:
+                xml_text = f.read()
         else:
-            filename = "new config"
+            filename = saved_as or "new config"
         try:
             response = self.request(url, method="POST", data=xml_text, auth=True)
             self.echo_info(f"Posted {filename} to {self.job_name} config.xml")
@@ -826,7 +1182,7 @@ or the certificate has expired.
             r = e.response
             if r.status_code == 500:
                 new_config_msg = ""
-                if filename:
+                if filename and filename != "new config":
                     new_config_msg = f"New config.xml was saved to {filename}\n"
                 print(f"""
 POST of config.xml was refused on server.
@@ -869,139 +1225,299 @@ You can inspect the Jenkins server logs for the exact cause here:
     def get_groovy_script(self):
         xml, dom = self.get_config_as_xml_and_dom()
         node = xml_get_first_child_node_of_tag(dom, "script")
-        return node.nodeValue if node else ""
+        return node.text or "" if node is not None else ""
 
     def get_config_replace_script_and_post(self, filename):
-        script_text = open(filename, "r").read()
+        with open(filename, "r") as f:
+            script_text = f.read()
 
         if not self.pipeline_linter_is_valid(script_text):
             raise JenkinsException("Not posting groovy file due to Jenkins linter errors")
 
-        xml, dom = self.get_config_as_xml_and_dom()
+        xml_bytes = self.get_config_xml()
 
+        # Write the backup in the background while the new config is prepared.
+        # Both files must be written before the POST: a failed backup write
+        # must abort before the config on the server is overwritten
         ts = datetime.datetime.fromtimestamp(time.time())
         backup_file, _ = self.make_output_filename_and_symlink(with_job_id=False)
         backup_file += ts.strftime("-config.xml.%Y%m%d-%H%M%S")
-        open(backup_file, "w").write(xml)
-        self.echo_info(f"Wrote backup of config.xml to {backup_file}")
+        import concurrent.futures
+        writer = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        backup_written = writer.submit(write_file_atomic, backup_file, xml_bytes)
+
+        # Splice the new script directly into the XML and only parse it
+        # when the <script> element is not on the expected simple form
+        new_xml = xml_replace_script_text(xml_bytes, script_text)
+        if new_xml is None:
+            import xml.etree.ElementTree as ElementTree
+            dom = ElementTree.fromstring(xml_bytes)
+            node = xml_get_first_child_node_of_tag(dom, "script")
+            if node is None:
+                raise ValueError("<script> element not found in config")
+            node.text = script_text
+            new_xml = ElementTree.tostring(dom, xml_declaration=True, encoding='UTF-8')
 
-        node = xml_get_first_child_node_of_tag(dom, "script")
-        if not node:
-            raise ValueError("<script> element not found in config")
-
-        node.nodeValue = script_text
         self.echo_info(f"Replaced config.xml <script> with file '{filename}'")
 
         new_config, _ = self.make_output_filename_and_symlink(with_job_id=False)
         new_config += ts.strftime("-new-config.xml")
-        open(new_config, "wb").write(dom.toxml('utf-8'))
+        new_config_written = writer.submit(write_file_atomic, new_config, new_xml)
+        writer.shutdown(wait=True)
+        backup_written.result()
+        self.echo_info(f"Wrote backup of config.xml to {backup_file}")
+        new_config_written.result()
         self.echo_info(f"Wrote new version of config.xml to {new_config}")
-        self.post_config_xml(filename=new_config)
 
-    def make_output_filename_and_symlink(self, with_job_id=True):
+        self.post_config_xml(data=new_xml, saved_as=new_config)
+
+    def make_output_filename_and_symlink(self, with_job_id=True, job_id=None):
         logpath_job = f"{self.console_log_dir}/{self.job_name}"
         symlink = f"{logpath_job}-latest" if is_posix() else ""
         logfile = f"{logpath_job}"
         if with_job_id:
-            logfile += f"-{self.job_id}"
+            logfile += f"-{job_id or self.job_id}"
         os.makedirs(os.path.dirname(logpath_job), exist_ok=True)
         return logfile, symlink
 
-    def get_console_output_for_job(self, name, job_id, fout, stdout):
+    def fetch_console_incremental(self, job_url, offset):
+        """
+        Fetch the part of the console log that follows `offset`
 
+        :param job_url: Jenkins job URL including build number
+        :param offset:  Byte offset into console log to start from
+        :return:        iterator over content chunks (bytes), new offset, True if more data will follow
+        """
+        url = f"{job_url}/logText/progressiveText"
+        r = self.request(url, params={'start': offset}, stream=True)
+        new_offset = int(r.headers.get('X-Text-Size', offset))
+        more_data = r.headers.get('X-More-Data') == 'true'
+        return r.iter_content(chunk_size=65536), new_offset, more_data
+
+    def get_console_output_for_job(self, name, job_id, fout, stdout):
+        """
+        :param fout:   Binary file object to write console output to, or None
+        :param stdout: True to also write console output to stdout
+        """
         job_url = self.get_job_id_url(name=name, job_id=job_id)
         text_size = 0
         started_at = time.time()
         last_output_at = started_at
         last_progress_at = last_output_at
+        last_flush_at = last_output_at
+        # Set JENKINS_LOG_UNBUFFERED=1 in environment to flush log file on every write
+        unbuffered = bool(os.environ.get("JENKINS_LOG_UNBUFFERED"))
+
+        # Console output is written as bytes, bypassing the text layer of stdout
+        out = None
+        if stdout:
+            sys.stdout.flush()
+            out = sys.stdout.buffer
 
         while True:
-            url = f"{job_url}/logText/progressiveText?start={text_size}"
-            r = self.request(url)
-            if r.text:
+            chunks, text_size, more_data = self.fetch_console_incremental(job_url, text_size)
+            got_output = False
+            for chunk in chunks:
+                got_output = True
+                if out:
+                    out.write(chunk)
+                if fout:
+                    fout.write(chunk)
+                    if unbuffered:
+                        fout.flush()
+
+            if got_output:
                 last_output_at = time.time()
                 last_progress_at = last_output_at
-                if stdout:
-                    sys.stdout.write(r.text)
-                if fout:
-                    fout.write(r.text)
+                if out:
+                    out.flush()
+                # Flush log file at most once per second
+                if fout and last_output_at - last_flush_at >= 1.0:
                     fout.flush()
+                    last_flush_at = last_output_at
 
-            more_data = r.headers.get('X-More-Data')
-            text_size = r.headers.get('X-Text-Size')
             if not more_data:
+                if fout:
+                    fout.flush()
                 break
 
-            time.sleep(self.console_poll_interval)
-
-            if time.time() - last_progress_at >= 10:
-                last_progress_at = time.time()
+            if self._console_stop.wait(self.console_poll_interval):
+                if fout:
+                    fout.flush()
+                break
 
-                since_start = deltatimeToHumanStr(time.time() - started_at)
-                since_output = deltatimeToHumanStr(time.time() - last_output_at)
-                self.echo_progress(
-                    f"Waiting for output: started {since_start} ago, last output {since_output} ago")
+            now = time.time()
+            if now - last_progress_at >= 10:
+                last_progress_at = now
+                # skip formatting when progress messages are suppressed
+                if self.log_progress:
+                    since_start = deltatimeToHumanStr(int(now - started_at))
+                    since_output = deltatimeToHumanStr(int(now - last_output_at))
+                    self.echo_progress(
+                        f"Waiting for output: started {since_start} ago, last output {since_output} ago")
 
     def get_console_output(self):
         """
         https://jenkins.lan/job/openwrt/17/logText/progressiveText?start=0
         """
-        # only print to stdout if we are getting log of a single job
-        is_only_one_job = len(list(self.job_id_iter())) == 1
+        job_ids = self.job_id_iter()
+        if len(job_ids) == 1:
+            # only print to stdout if we are getting log of a single job
+            self.save_console_output(job_ids[0], stdout=True)
+            return
+
+        # Logs of several builds are only written to files, so fetch them concurrently
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.HTTP_WORKERS, len(job_ids))) as ex:
+            futures = [ex.submit(self.save_console_output, job_id, stdout=False) for job_id in job_ids]
+            for f in futures:
+                f.result()
+        self.job_id = job_ids[-1]
+
+    def save_console_output(self, job_id, stdout):
+        """
+        Get console output of a single build and save it to file in `console_log_dir`
+        (unless `console_output_file` is False)
+
+        :param job_id: Jenkins build number
+        :param stdout: True to also write console output to stdout and update the "-latest" symlink
+        """
+        fout = None
+        symlink = None
+        logfile = None
+        if self.console_output_file:
+            logfile, symlink = self.make_output_filename_and_symlink(job_id=job_id)
+            logfile = f"{logfile}-console.log"
+            fout = open(logfile, "wb", buffering=65536)
+            if symlink and stdout:
+                symlink = f"{symlink}-console.log"
+                if os.path.islink(symlink):
+                    os.remove(symlink)
+                os.symlink(os.path.basename(logfile), symlink)
 
-        for job_id in self.job_id_iter():
-            fout = None
-            if self.console_output_file:
-                logfile, symlink = self.make_output_filename_and_symlink()
-                self.console_output_file = f"{logfile}-console.log"
-                fout = open(self.console_output_file, "w")
-                if symlink and is_only_one_job:
-                    symlink = f"{symlink}-console.log"
-                    if os.path.islink(symlink):
-                        os.remove(symlink)
-                    os.symlink(os.path.basename(self.console_output_file), symlink)
+        try:
+            self.get_console_output_for_job(name=None, job_id=job_id, fout=fout, stdout=stdout)
+        finally:
+            if fout:
+                fout.close()
 
-            self.get_console_output_for_job(name=None, job_id=job_id, fout=fout, stdout=is_only_one_job)
+        if logfile:
+            self.echo_info(f"Wrote console output to {logfile}")
+            if symlink and stdout:
+                self.echo_info(f"Wrote symlink {symlink}")
 
-            if self.console_output_file:
-                self.echo_info(f"Wrote console output to {self.console_output_file}")
-                if symlink and is_only_one_job:
-                    self.echo_info(f"Wrote symlink {symlink}")
+    def get_console_output_in_background(self):
+        """
+        Run `get_console_output()` in a background thread, e.g. while waiting
+        for job completion with `job_wait()`.
+        An exception raised in the thread is re-raised by `result()` of the returned future.
+        The thread is a daemon thread (not an executor worker), so a console
+        read stalled in the network does not block interpreter exit
 
-    def req_waitfor_key_value(self, url, key, wait_msg="result", timeout=60, interval=1):
+        :return: concurrent.futures.Future of the console output thread
         """
-        Continuously poll ``url`` (api/json) and return when JSON response object
-        contains ``key`` and is non-empty
+        import concurrent.futures
+        self._console_stop.clear()
+        future = concurrent.futures.Future()
+        future.set_running_or_notify_cancel()
 
-        :param url:      Jenkins job url
-        :param key:      JSON key to wait for
-        :param wait_msg: User meesage printed on console
-        :param timeout:  Timeout
-        :param interval: Poll interval
-        :return:         JSON response object
+        def run():
+            try:
+                future.set_result(self.get_console_output())
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="console", daemon=True).start()
+        return future
+
+    def console_stop(self, console, timeout):
         """
-        if not interval:
-            interval = max(int(timeout / 30), 5)
+        Make console output thread stop polling and wait at most `timeout` seconds for it to end
 
-        started = time.time()
+        :param console: Future returned by `get_console_output_in_background()`
+        """
+        import concurrent.futures
+        if not console.done():
+            self._console_stop.set()
+            concurrent.futures.wait([console], timeout=timeout)
+
+    def req_waitfor_key_value(self, url, key, wait_msg="result", timeout=60, min_interval=0.5, max_interval=None,
+                              progress=True, params=None):
+        """
+        Continuously poll ``url`` (api/json) and return when JSON response object
+        contains ``key`` and is non-empty.
+        The poll interval starts at ``min_interval`` and grows exponentially
+        (with a bit of jitter) up to ``max_interval``
+
+        :param url:          Jenkins job url
+        :param key:          JSON key to wait for
+        :param wait_msg:     User meesage printed on console
+        :param timeout:      Timeout
+        :param min_interval: Initial poll interval
+        :param max_interval: Maximum poll interval. Default is auto-computed from timeout
+        :param progress:     Print progress messages while waiting
+        :param params:       Dictionary of request params, e.g. a 'tree' to limit the response
+        :return:             JSON response object
+        """
+        import requests
+        import urllib3
+        if not max_interval:
+            max_interval = max(int(timeout / 30), 5)
+        interval = min(min_interval, max_interval)
+
+        if not url.endswith("/api/json"):
+            url += "/api/json"
+        # Conditional GET: when the server sends a validator and the resource is
+        # unchanged, the 304 response has no body and the previous JSON is reused
+        headers = dict(self.API_JSON_HEADERS)
+        jr = None
+        poll_timeout = (self.HTTP_TIMEOUT[0], min(max_interval * 4, 15))
+
+        # monotonic clock: immune to wall-clock adjustments during a long wait
+        clock = time.monotonic
+        started = now = clock()
         deadline = started + timeout
-        elapsed = 0
-        while time.time() < deadline:
+        next_progress_at = started + 1
+        while now < deadline:
 
-            jr = self.request_api_json(url)
+            # a slow poll response must not use up the whole deadline: on read timeout just poll again.
+            # Once the session's Retry is exhausted a read timeout surfaces as a
+            # ConnectionError wrapping MaxRetryError. Any other connection error
+            # (refused, DNS, unreachable) is raised
+            try:
+                response = self.request(url, params=params, headers=headers, timeout=poll_timeout)
+            except (requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError) as e:
+                reason = getattr(e.args[0], 'reason', None) if e.args else None
+                if not (isinstance(e, requests.exceptions.ReadTimeout)
+                        or isinstance(reason, urllib3.exceptions.ReadTimeoutError)):
+                    raise
+                self.echo_note(f"No response from {url} within {poll_timeout[1]}s, polling again", file=sys.stderr)
+                response = None
+            if response is not None and (response.status_code != 304 or jr is None):
+                jr = self.response_json(response)
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                if etag:
+                    headers['If-None-Match'] = etag
+                if last_modified:
+                    headers['If-Modified-Since'] = last_modified
 
             # only return if key exists AND has a value
-            value = jr.get(key)
-            if value is not None:
-                self.echo_verb(f"Got: {key}")
+            if jr is not None and jr.get(key) is not None:
+                self.echo_verb("Got: %s", key)
                 return jr
 
-            time.sleep(interval)
-            elapsed = time.time() - started
-            if elapsed < 20 or int(elapsed) % 5 < interval:
+            sleep = interval + random.uniform(0, 0.2 * interval)
+            time.sleep(max(0, min(sleep, deadline - clock())))
+            interval = min(max_interval, interval * 1.5)
+
+            now = clock()
+            if progress and self.log_progress and now >= next_progress_at:
+                elapsed = now - started
+                next_progress_at = now + (1 if elapsed < 20 else 5)
                 self.echo_progress(f"Waiting for {wait_msg}: {elapsed:.0f}s of {timeout}s")
 
-        msg = f"TIMEOUT after {elapsed:.0f}s while waiting for {wait_msg}"
+        msg = f"TIMEOUT after {now - started:.0f}s while waiting for {wait_msg}"
         raise JenkinsException(msg)
 
     def job_start(self, name=None, params=None):
@@ -1013,33 +1529,39 @@ You can inspect the Jenkins server logs for the exact cause here:
         """
         # See if it is a parameterized job or not
         job_url = self.get_job_url(name)
-        jr = self.request_api_json(job_url)
+        params_tree = 'property[_class,parameterDefinitions[name,defaultParameterValue[value],description]]'
+        jr = self.request_api_json(job_url, params={'tree': params_tree})
         job_params = self.job_get_param_definition(jr)
-        allparams = self.build_params_default
-
-        if job_params:
-            self.echo_info(f"Starting Jenkins parameterized job {self.job_name}")
-            self.echo_info(f"Using parameters: '{self.build_params_default}' (config default) '{params}' (user supplied)")
-            build = "buildWithParameters"
-            if params:
-                allparams += f",{params}"
-        else:
-            self.echo_info(f"Starting Jenkins job {self.job_name}")
-            build = "build"
 
-        if not "delay=0" in allparams:
-            self.echo_info(f"Build parameters do not contain 'delay=0' although it is highly recommended")
         try:
-            build_params = key_value_str_to_dict(allparams)
-        except:
-            raise ValueError("Invalid job PARAMS list")
+            # merge into a new dict: neither the cached defaults nor the caller's params are modified
+            build_params = dict(key_value_str_to_mapping(self.build_params_default))
+            if job_params:
+                self.echo_info(f"Starting Jenkins parameterized job {self.job_name}")
+                user_params = params if isinstance(params, str) else ",".join(f"{k}={v}" for k, v in (params or {}).items())
+                self.echo_info(f"Using parameters: '{self.build_params_default}' (config default) '{user_params}' (user supplied)")
+                build = "buildWithParameters"
+                if params:
+                    build_params.update(key_value_str_to_mapping(params) if isinstance(params, str) else params)
+            else:
+                self.echo_info(f"Starting Jenkins job {self.job_name}")
+                build = "build"
+        except ValueError:
+            raise ValueError("Invalid job PARAMS list") from None
+
+        if str(build_params.get('delay')) != "0":
+            self.echo_info(f"Build parameters do not contain 'delay=0' although it is highly recommended")
 
+        import requests
         url = f"{job_url}/{build}"
         try:
             self.job_started = time.time()
-            resp = self.request(url, params=build_params)
+            # POST: it starts a build, so it must never be retried (urllib3 Retry
+            # only re-sends idempotent methods)
+            resp = self.request(url, method="POST", params=build_params)
         except requests.exceptions.RequestException as e:
-            if hasattr(e, 'response') and e.response.status_code == 403:
+            # e.response is None for connection errors (retries are already exhausted then)
+            if e.response is not None and e.response.status_code == 403:
                 print("""
 Reason for not being able to start a build remotely, might be because
 the project config does not have auth token enabled.
@@ -1049,7 +1571,7 @@ It can be enabled it in the web UI under
 After that, add the "token=sometoken" as a parameter on the command line
 or as build_params_default in config file.
 """)
-            raise JenkinsException(f"FAILED to start jenkins job {self.job_name} with {url}")
+            raise JenkinsException(f"FAILED to start jenkins job {self.job_name} with {url}") from e
 
         location_url = resp.headers.get('Location')
         if not location_url:
@@ -1058,8 +1580,11 @@ or as build_params_default in config file.
 
         self.echo_info(f"Requested Jenkins job {self.job_name}, waiting for build number")
 
-        url = f"{location_url}api/json"
-        jr = self.req_waitfor_key_value(url, key="executable", wait_msg="job start", timeout=120)
+        # The queue item Location normally ends in '/', but do not rely on it
+        url = location_url.rstrip("/") + "/api/json"
+        jr = self.req_waitfor_key_value(url, key="executable", wait_msg="job start", timeout=120,
+                                        min_interval=0.5, max_interval=2,
+                                        params={'tree': 'executable[number]'})
         number = jr['executable']['number']
         self.job_id = number
 
@@ -1073,20 +1598,33 @@ or as build_params_default in config file.
         http://<Jenkins_URL>/queue/cancelItem?id=<queueItem>
         """
         self.get_job_url() # set self.job_name
-        queue = list(self.get_queue_by_job(self.job_name))
-        if not queue:
-            self.echo_note(f"Job {self.job_name} not in queue")
-            return 0
+        url = f"{self.server_url}/queue/cancelItem"
 
-        self.echo_info(f"Cancelling {len(queue)} in queue")
-        for item in queue:
-            url = f"{self.server_url}/queue/cancelItem"
-            params = { 'id': item['id']}
+        def cancel_item(item_id):
+            params = { 'id': item_id}
             resp = self.request(url, method="POST", params=params, auth=True)
-            if resp.ok:
-                self.echo_info(f"Job {item['id']} cancelled")
-
-        return len(queue)
+            return item_id, resp.ok
+
+        # Jenkins has no bulk cancel, so issue the POSTs concurrently over the pooled session
+        import concurrent.futures
+        found = 0
+        cancelled = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.HTTP_WORKERS) as ex:
+            futures = []
+            for item in self.get_queue_by_job(self.job_name):
+                found += 1
+                futures.append(ex.submit(cancel_item, item['id']))
+            for f in concurrent.futures.as_completed(futures):
+                item_id, ok = f.result()
+                if ok:
+                    cancelled += 1
+                    self.echo_info("Job %s cancelled", item_id)
+
+        if not found:
+            self.echo_note(f"Job {self.job_name} not in queue")
+        else:
+            self.echo_info(f"Cancelled {cancelled} of {found} in queue")
+        return cancelled
 
     def job_stop(self):
         """
@@ -1120,18 +1658,22 @@ or as build_params_default in config file.
 
     def job_get_poll_interval(self):
         url = self.get_job_id_url()
-        jr = self.request_api_json(url)
+        jr = self.request_api_json(url, params={'tree': 'estimatedDuration'})
         estDuration = jr.get('estimatedDuration', 60000) / 1000
         est_str = deltatimeToHumanStr(estDuration)
         self.echo_info(f"Jenkins job {self.job_name}/{self.job_id} estDuration={est_str}")
         return self.compute_job_poll_interval(estDuration, 0)
 
 
-    def job_wait(self, name=None, job_id=None, build_wait=None):
+    def job_wait(self, name=None, job_id=None, build_wait=None, console=None):
         """
         :param build_wait: Seconds to wait for build completion
+        :param console:    Future of thread streaming console output (see `get_console_output_in_background()`).
+                           Wait progress is not printed as it would interleave with console output.
+                           The thread is always ended before returning, and its exception (if any) re-raised
         :return:
         """
+        import concurrent.futures
         if not job_id:
             job_id = self.job_id
         if not job_id:
@@ -1142,7 +1684,29 @@ or as build_params_default in config file.
         if build_wait:
             timeout = build_wait
 
-        jr = self.req_waitfor_key_value(job_url, key="result", wait_msg="job completion", timeout=timeout, interval=poll)
+        params = {'tree': 'result,duration,artifacts[displayPath,fileName,relativePath]'}
+        console_timeout = max(30, 3 * self.console_poll_interval)
+        try:
+            jr = self.req_waitfor_key_value(job_url, key="result", wait_msg="job completion", timeout=timeout,
+                                            min_interval=1, max_interval=poll, progress=console is None,
+                                            params=params)
+        except BaseException:
+            if console:
+                # End the console thread before the caller closes the session it is using
+                self.console_stop(console, console_timeout)
+                if console.done() and console.exception():
+                    self.echo_note(f"Console output failed: {console.exception()!r}", file=sys.stderr)
+            raise
+
+        if console:
+            # Build is complete so console stream ends after its next poll.
+            # result() re-raises an exception from the console thread
+            try:
+                console.result(timeout=console_timeout)
+            except concurrent.futures.TimeoutError:
+                self.echo_note("Console output did not end in time, stopping it")
+            finally:
+                self.console_stop(console, console_timeout)
         result = jr.get('result')
 
         elapsed = deltatimeToHumanStr(int(jr.get('duration', 0)) / 1000)
@@ -1155,11 +1719,80 @@ or as build_params_default in config file.
         return result
 
 
+    def save_response_to_file(self, response, dest_path):
+        """
+        Stream body of `response` (from a request with stream=True) to `dest_path`
+        in large chunks rather than holding it in memory. The body is written to
+        a temporary ".part" file which is renamed to `dest_path` when the transfer
+        is complete, such that a failed transfer does not leave a truncated file behind
+
+        :param response:  requests.Response object
+        :param dest_path: Destination file path
+        :return:          Number of bytes written
+        """
+        bufsize = 1 << 20
+        dest_path = Path(dest_path)
+        part_path = dest_path.with_name(dest_path.name + ".part")
+        try:
+            with response:
+                # Unbuffered file: the chunks are large, so a file buffer would only
+                # add a copy and another `bufsize` of memory per concurrent download
+                with part_path.open('wb', buffering=0) as f:
+                    self.preallocate_file(f, response)
+                    write = f.write
+                    size = 0
+                    # iter_content() decodes any Content-Encoding and, unlike a plain
+                    # raw.read() loop, does not stop early on an empty decoded chunk.
+                    # NOTE: A raw.readinto() loop over one reused bytearray does not
+                    # save anything: urllib3 implements readinto() as read() followed
+                    # by a copy into the buffer, i.e. one more copy per chunk
+                    for chunk in response.iter_content(chunk_size=bufsize):
+                        n = write(chunk)
+                        while n < len(chunk):
+                            n += write(memoryview(chunk)[n:])
+                        size += n
+                    # Drop any preallocated space beyond the actual content
+                    f.truncate(size)
+            os.replace(part_path, dest_path)
+        except BaseException:
+            if part_path.exists():
+                part_path.unlink()
+            raise
+        return size
+
+    @staticmethod
+    def preallocate_file(f, response):
+        """
+        Preallocate disk space for the body of `response` when its size is known
+        from the Content-Length header (and it is not content-encoded, as the
+        decoded size is then unknown). This reduces fragmentation and makes a
+        full disk fail up front. The file size will be Content-Length afterwards
+        """
+        length = response.headers.get('Content-Length')
+        if not length or response.headers.get('Content-Encoding') or not hasattr(os, "posix_fallocate"):
+            return
+        try:
+            os.posix_fallocate(f.fileno(), 0, int(length))
+        except (OSError, ValueError):
+            pass
+
+    def download_to_file(self, url, dest_path, **kwargs):
+        """
+        Stream response body of `url` to `dest_path`, see `save_response_to_file()`
+
+        :param url:       URL to download
+        :param dest_path: Destination file path
+        :param kwargs:    Extra arguments for `request()`
+        :return:          Number of bytes written
+        """
+        response = self.request(url, stream=True, **kwargs)
+        return self.save_response_to_file(response, dest_path)
+
     def fetch_artifacts(self, dest_dir, artifacts=None):
         if not artifacts:
             artifacts = self.artifacts
         if not artifacts:
-            self.echo_verb(f"Querying artifacts of job {self.job_name}/{self.job_id}")
+            self.echo_verb("Querying artifacts of job %s/%s", self.job_name, self.job_id)
             jr = self.build_get()
             artifacts = jr.get('artifacts', [])
 
@@ -1167,17 +1800,26 @@ or as build_params_default in config file.
             self.echo_info(f"Job {self.job_name}/{self.job_id} has no build artifacts")
             return 0
 
-        job_url = self.get_job_id_url()
+        artifact_url_prefix = self.get_job_id_url() + "/artifact/"
 
+        # Artifacts in different dirs can have the same fileName. Only download
+        # the last one of these (as a sequential download would have left it)
+        # such that two threads never write to the same file
+        downloads = {}
         for item in artifacts:
-            relpath = item['relativePath']
-            artifact_url = f"{job_url}/artifact/{relpath}"
-            response = self.request(artifact_url)
+            downloads[Path(dest_dir, item['fileName'])] = artifact_url_prefix + item['relativePath']
+
+        # Download artifacts concurrently over the pooled session
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.HTTP_WORKERS, len(downloads))) as ex:
+            futures = []
+            for dest_path, artifact_url in downloads.items():
+                self.echo_info("Saving artifact %s", dest_path)
+                futures.append(ex.submit(self.download_to_file, artifact_url, dest_path))
+            for f in concurrent.futures.as_completed(futures):
+                f.result()
 
-            dest_path = Path(dest_dir, item['fileName'])
-            self.echo_info(f"Saving artifact {dest_path}")
-            with dest_path.open('wb') as f:
-                f.write(response.content)
+        return len(downloads)
 
 
     def workspace_wipeout(self, name=None):
@@ -1193,7 +1835,7 @@ or as build_params_default in config file.
             self.jenkins = jenkins
             self.message = message
             self.started = None
-            self.running = True
+            self._stop_event = threading.Event()
             self.daemon = True
 
         def run(self):
@@ -1202,45 +1844,50 @@ or as build_params_default in config file.
             while True:
                 elapsed = time.time() - self.started
                 interval = 1 if elapsed < 4 else 2 if elapsed < 20 else 5
-                for i in range(10 * interval):
-                    # Chunk the waiting so we can stop thread quickly (max 100ms latency)
-                    # This only has an effect when we use thread.join()
-                    time.sleep(0.1)
-                    if not self.running:
-                        # self.jenkins.echo_progress(f"Waiter thread stopped")
-                        return
-                elapsed_human = deltatimeToHumanStr(time.time() - self.started)
+                # Wait returns immediately when stop() is called
+                if self._stop_event.wait(interval):
+                    # self.jenkins.echo_progress(f"Waiter thread stopped")
+                    return
+                if not self.jenkins.log_progress:
+                    continue
+                elapsed_human = deltatimeToHumanStr(int(time.time() - self.started))
                 self.jenkins.echo_progress(f"{self.message}: {elapsed_human} elapsed")
 
         def stop(self):
-            self.running = False
+            self._stop_event.set()
             #self.join()
 
-    def workspace_get_file_or_zipped_dir(self, filepath):
+    def workspace_get_file_or_zipped_dir(self, filepath, dest_dir="."):
         """
-        Fetch `filepath` from job workspace. `filepath` can refer to either a
-        file or a directory and this will be automatically detected.
+        Fetch `filepath` from job workspace and stream it to a file in `dest_dir`.
+        `filepath` can refer to either a file or a directory and this will be
+        automatically detected.
         If it is a directory, the returned filepath will end in ".zip".
         Otherwise, if it is a file, returned `filepath` is unmodified
 
         :param filepath: Path to file or directory in Jenkins workspace
-        :return:         content, filepath (possibly with ".zip" suffix if item was a directory)
+        :param dest_dir: Directory to write file to
+        :return:         size, filepath (possibly with ".zip" suffix if item was a directory)
         """
+        import requests
+
         def request_transfer_and_wait(url):
             try:
                 waiter = Jenkins.Waiter(self, "Transferring")
                 waiter.start()
                 item_path = os.path.basename(url)
-                resp = self.request(url, method="POST", auth=True)
+                resp = self.request(url, method="POST", auth=True, stream=True)
                 # This is a quick adhoc fix for determining whether we get an HTML
                 # page listing files or if we got the actual file
                 if 'X-Instance-Identity' in resp.headers:
+                    resp.close()
                     self.echo_info(f"{filepath} seems to be a directory: fetching with modified URL...")
                     item_path += ".zip"
                     url = f"{url}/*zip*/{item_path}"
-                    resp = self.request(url, method="POST", auth=True)
+                    resp = self.request(url, method="POST", auth=True, stream=True)
 
-                return resp.content, item_path
+                dest_path = os.path.join(dest_dir, item_path)
+                return self.save_response_to_file(resp, dest_path), dest_path
 
             except requests.exceptions.HTTPError as e:
                 if e.response.status_code != 404:
@@ -1274,18 +1921,18 @@ or as build_params_default in config file.
             self.echo_info("Getting workspace file ...")
             url_base = self.get_job_url()
             url = f"{url_base}/ws/{filepath}"
-            content, itempath = request_transfer_and_wait(url)
-            if content:
-                return content, itempath
+            size, itempath = request_transfer_and_wait(url)
+            if itempath:
+                return size, itempath
 
         # TODO: Use async
         self.echo_info("Getting workspace file (trying all nodes...)")
         url_base = self.get_job_id_url(job_id="lastBuild")
         for i, node in enumerate(self.get_nodes()):
             url = f"{url_base}/execution/node/{str(i)}/ws/{filepath}"
-            content, itempath = request_transfer_and_wait(url)
-            if content:
-                return content, itempath
+            size, itempath = request_transfer_and_wait(url)
+            if itempath:
+                return size, itempath
 
         raise ValueError("Exhausted .../execution/node/<ID>/ws/... URL attempts")
 
@@ -1315,25 +1962,33 @@ or as build_params_default in config file.
             raise ValueError(f"{dest_zip_path} already exists") # FileExistsError
 
         started = time.time()
-        content, item_path = self.workspace_get_file_or_zipped_dir(path)
-        if not content:
+        size, item_path = self.workspace_get_file_or_zipped_dir(path, dest_dir=dest_dir)
+        if not item_path:
             return
 
         elapsed = time.time() - started
+        size_kb = size / 1024
         if elapsed > 2:
-            size_kb = len(content) / 1024
             size_mb = size_kb / 1024
             size_str = f"{size_mb:.1f}MB" if size_mb > 5 else f"{size_kb:.1f}kB"
             elapsed_human = deltatimeToHumanStr(elapsed)
-            self.echo_info(f"Transferred {size_str} in {elapsed_human}")
+            self.echo_info(f"Transferred {size_str} in {elapsed_human} ({size_kb / elapsed:.1f}kB/s)")
 
-        open(item_path, "wb").write(content)
-        size_kb = len(content) / 1024
         self.echo_info(f"Wrote {size_kb:.1f}kB to {item_path}")
 
 
 prog = os.path.basename(__file__)
 
+def build_params_arg(s):
+    """
+    argparse type for -p: parse and validate the key=value list once, when
+    the command-line is parsed, such that a bad list gives a usage error
+    """
+    try:
+        return key_value_str_to_dict(s) if s else {}
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
 def parser_create():
     description = f"""\
 Start Jenkins jobs remotely via Jenkins REST API, show console log,
@@ -1355,7 +2010,7 @@ See command-line examples with: {prog} -hh
     args_build = parser.add_argument_group("Build arguments")
     args_build.add_argument('-b', dest='do_build', default=False, action="store_true",
         help="Start build job")
-    args_build.add_argument('-p', dest='params', metavar='PARAMS', type=str, default="",
+    args_build.add_argument('-p', dest='params', metavar='PARAMS', type=build_params_arg, default="",
         help="Job params given as comma separated list of key=value pairs, e.g. 'foo=1,baz=10'")
     args_build.add_argument('-B', dest='stop_build', action='count', default=0,
         help="Stop build job. Give option twice to cancel job")
@@ -1466,16 +2121,19 @@ if __name__ == "__main__":
 
     def print_traceback_tip():
         if 'd' in opt.log_http:
+            import traceback
             traceback.print_exc()
         else:
             print(f"{fg.yellow}Tip: add -dd command-line option to see traceback{fg.reset}")
 
+    import requests
     jen = Jenkins(verbose=opt.verbose)
 
     # Order of preference is from highest to lowest: commandline, environment, config
     conffile = Config().read(jen)
 
     color_enable()
+    jen._refresh_fmt()
 
     env_auth = os.environ.get("JENKINS_AUTH")
     auth = opt.auth or env_auth or f"{jen.auth_user}:{jen.auth_password}"
@@ -1484,6 +2142,7 @@ if __name__ == "__main__":
         if len(user_passwd) != 2:
             raise ValueError("User name and API token must be separated by colon")
         jen.auth_user, jen.auth_password = user_passwd
+    jen._refresh_auth()
 
     if opt.verbose >= 2:
         jen.log_enable("srr")
@@ -1498,6 +2157,10 @@ if __name__ == "__main__":
     try:
         url = os.environ.get("JENKINS_URL")
         jen.server_url = opt.server_url or url or jen.server_url
+        if jen.server_url:
+            # All URLs are built as server_url + "/...", so avoid "//" which
+            # Jenkins answers with a redirect (or 404)
+            jen.server_url = jen.server_url.rstrip("/")
         if not jen.server_url:
             raise ValueError(f"Jenkins URL not set")
         if not jen.server_url.startswith("http"):
@@ -1515,8 +2178,7 @@ if __name__ == "__main__":
 
         if opt.get_config:
             jen.assert_auth_is_valid()
-            xml, _ = jen.get_config_as_xml_and_dom()
-            print(xml)
+            print(jen.get_config_xml_text())
 
         if opt.post_config:
             jen.assert_auth_is_valid()
@@ -1538,20 +2200,20 @@ if __name__ == "__main__":
 
         elif opt.do_build:
             jen.job_start(params=opt.params)
-            if opt.get_console:
-                jen.get_console_output()
-            jen.job_wait(build_wait=opt.timeout)
+            console = jen.get_console_output_in_background() if opt.get_console else None
+            jen.job_wait(build_wait=opt.timeout, console=console)
 
         elif opt.job_wait:
+            console = None
             if opt.get_console:
                 # Get job ID/number of (currently running) lastBuild job
                 url = jen.get_job_url()
-                jr = jen.request_api_json(url)
+                jr = jen.request_api_json(url, params={'tree': 'lastBuild[number]'})
                 last = jr['lastBuild']
                 if last:
                     jen.job_id = last.get('number')
-                    jen.get_console_output()
-            jen.job_wait(build_wait=opt.timeout)
+                    console = jen.get_console_output_in_background()
+            jen.job_wait(build_wait=opt.timeout, console=console)
 
         elif opt.get_console:
             jen.get_console_output()
@@ -1585,6 +2247,12 @@ if __name__ == "__main__":
         print(f"{color.error}{r.status_code} {r.reason} for {r.url}{fg.reset}")
         print_traceback_tip()
         sys.exit(4 if r.status_code < 500 else 5)
+    except requests.exceptions.SSLError as e:
+        # There is no connectivity probe up front, so explain certificate errors here
+        print(f"{color.error}{e}{fg.reset}")
+        print(Jenkins.CACERT_ERROR_MSG)
+        print_traceback_tip()
+        sys.exit(1)
     except (requests.exceptions.RequestException, JenkinsException, ValueError) as e:
         print(f"{color.error}{e}{fg.reset}")
         print_traceback_tip()
@@ -1599,3 +2267,5 @@ if __name__ == "__main__":
                 print(f"""Not stopping job because
 {Config.FILENAME} deos not contain 'stop_job_on_user_abort=yes'""")
         sys.exit(1)
+    finally:
+        jen.close()